@@ -1,17 +1,19 @@
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit import PromptSession
-from prompt_toolkit.completion import WordCompleter
-from prompt_toolkit.shortcuts import clear as clear_screen
+from prompt_toolkit.completion import Completer, Completion
 import shutil
+import sys
 import re
-from datetime import datetime, date, timedelta
+from collections import deque
+from datetime import datetime, date, time as dt_time, timedelta
 
 from db import setup_database
 from query_scripts import (
     log_activity, update_activity, update_activity_tags, update_activity_category,
     delete_activity, get_activity, get_activities_by_date, get_activities_in_range,
     get_recent_activities, get_all_categories, get_or_create_category,
-    get_tags_for_category, get_or_create_tag, rename_category, delete_category,
+    get_tags_for_category, get_or_create_tags,
+    rename_category, delete_category,
     rename_tag, delete_tag, update_category_color, report_daily, report_categories, 
     report_tags
 )
@@ -24,42 +26,106 @@ from display import (
 MAX_UI_HEIGHT = 30
 COMMANDS = ["log", "edit", "delete", "view", "report", "manage", "help"]
 
-ui_state = []
+_TIME_RE = re.compile(r'^(\d{1,2}):(\d{2})\s*(am|pm)?$')
+_NEG_DAYS_RE = re.compile(r'^-(\d+)$')
+_HEX_RE = re.compile(r'^#[0-9A-Fa-f]{6}$')
+
+# cmd_view input: alias table for the fixed keywords, one regex for the
+# -N / w-N / ISO-date forms.
+_VIEW_ALIASES = {
+    "": "today", "t": "today", "today": "today",
+    "y": "yesterday", "yesterday": "yesterday",
+    "r": "range", "range": "range",
+    "w": "week",
+}
+_VIEW_RE = re.compile(r'^(?:-(?P<days>\d+)|w\s*-?\s*(?P<weeks>\d+)|(?P<iso>\d{4}-\d{2}-\d{2}))$')
+
+# Constant prompt strings, allocated once instead of per prompt call.
+_CATEGORY_PROMPT = "  Category: "
+_TAGS_PROMPT = "  Tags: "
+
+ui_state = deque(maxlen=MAX_UI_HEIGHT)
 cmd_session = None
 form_session = None
 
+# Command-scoped cache for category/tag listings: one fetch per command even
+# when several prompts need the same list. Cleared before each dispatch and
+# whenever a prompt may have created a new row mid-command.
+_db_cache = {"categories": None, "tags": {}}
+
+def invalidate_db_cache():
+    _db_cache["categories"] = None
+    _db_cache["tags"].clear()
+
+def cached_categories():
+    if _db_cache["categories"] is None:
+        _db_cache["categories"] = get_all_categories()
+    return _db_cache["categories"]
+
+def cached_tags(category_id):
+    tags = _db_cache["tags"].get(category_id)
+    if tags is None:
+        tags = _db_cache["tags"][category_id] = get_tags_for_category(category_id)
+    return tags
+
 class AbortInput(Exception):
     pass
 
+class CommandCompleter(Completer):
+    """Complete command names via the prebuilt prefix index (O(1) per keystroke)."""
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor.lower()
+        for cmd in _PREFIX_INDEX.get(text, ()):
+            yield Completion(cmd, start_position=-len(text))
+
 kb = KeyBindings()
 kb.add("c-z")(lambda event: event.app.exit(exception=AbortInput()))
 
-def header_line():
-    return "═" * shutil.get_terminal_size(fallback=(80, 24))[0]
+# Header rules are interned per width so a repaint at an unchanged size
+# never rebuilds the string. The size itself is queried once per render:
+# prompt_toolkit reinstalls and then resets the SIGWINCH handler around
+# every prompt, so a signal-refreshed cache would go stale after the
+# first prompt.
+_header_cache = {}
+
+def header_line(cols):
+    line = _header_cache.get(cols)
+    if line is None:
+        line = _header_cache[cols] = "═" * cols
+    return line
 
 def reset_ui():
-    global ui_state
-    ui_state = []
+    ui_state.clear()
 
-def add_ui(*lines):
-    for line in lines:
-        ui_state.extend(line if isinstance(line, list) else [str(line)])
+def add_ui(lines):
+    """Append a list of display lines to the UI buffer."""
+    ui_state.extend(lines)
 
 def render():
-    clear_screen()
-    rows = shutil.get_terminal_size(fallback=(80, 24))[1]
-    visible = ui_state[-min(len(ui_state), min(MAX_UI_HEIGHT, max(5, rows - 5))):]
-    
-    print(header_line())
-    print("  TASK LOGGER  │  'help' for commands  │  Ctrl+Z cancel  │  Ctrl+C exit")
-    print(header_line())
-    for line in visible:
-        print(line)
-    print(header_line())
+    # Home the cursor and repaint over the old frame, erasing anything left
+    # below it afterwards. Avoids the blank-screen flash of clear+reprint.
+    size = shutil.get_terminal_size(fallback=(80, 24))
+    window = min(MAX_UI_HEIGHT, max(5, size.lines - 5))
+    visible = list(ui_state)
+    if len(visible) > window:
+        visible = visible[-window:]
+
+    header = header_line(size.columns)
+    frame = [
+        header,
+        "  TASK LOGGER  │  'help' for commands  │  Ctrl+Z cancel  │  Ctrl+C exit",
+        header,
+    ]
+    frame.extend(visible)
+    frame.append(header)
+    # \x1b[K on every line: the frame is re-homed over whatever the prompt
+    # scrolled into place, so each row must clear its own stale remainder.
+    sys.stdout.write("\x1b[H" + "\n".join(f"\x1b[K{line}" for line in frame) + "\n\x1b[0J")
+    sys.stdout.flush()
 
 def parse_time_string(time_str, base_date):
     """Parse time string (e.g., 9:30, 9:30am, 2:00pm) into datetime."""
-    match = re.match(r'^(\d{1,2}):(\d{2})\s*(am|pm)?$', time_str.strip().lower())
+    match = _TIME_RE.match(time_str.strip().lower())
     if not match:
         return None
     
@@ -76,15 +142,19 @@ def parse_time_string(time_str, base_date):
     if hour > 23:
         return None
     
-    return datetime.combine(base_date, datetime.strptime(f"{hour:02d}:{minute:02d}", "%H:%M").time())
+    return datetime.combine(base_date, dt_time(hour, minute))
 
 def format_time_prompt(dt):
-    return dt.strftime("%I:%M%p").lstrip("0").lower() if dt else ""
+    if not dt:
+        return ""
+    hour12 = dt.hour % 12 or 12
+    return f"{hour12}:{dt.minute:02d}{'am' if dt.hour < 12 else 'pm'}"
 
 def prompt_str(prompt_text, required=True, default=None):
     prompt_text = f"{prompt_text} [{default}]: " if default else f"{prompt_text}: "
+    ask = form_session.prompt
     while True:
-        val = form_session.prompt(prompt_text).strip()
+        val = ask(prompt_text).strip()
         if val:
             return val
         if default:
@@ -95,9 +165,10 @@ def prompt_str(prompt_text, required=True, default=None):
 
 def prompt_time(prompt_text, base_date, default=None, required=True):
     prompt_text = f"{prompt_text} [{format_time_prompt(default)}]: " if default else f"{prompt_text}: "
-    
+    ask = form_session.prompt
+
     while True:
-        val = form_session.prompt(prompt_text).strip()
+        val = ask(prompt_text).strip()
         
         if not val:
             if default and isinstance(default, datetime):
@@ -134,33 +205,36 @@ def prompt_from_list(items, prompt_text, display_fn, allow_create=False, create_
 def prompt_category():
     """Prompt for category selection or creation. Returns category_id."""
     categories = prompt_from_list(
-        get_all_categories(), "Categories",
+        cached_categories(), "Categories",
         lambda c: color(c[1], c[2]) if c[2] else c[1], 
         allow_create=True
     )
-    
+    existing_names = {c[1].lower() for c in categories}
+    ask = form_session.prompt
+
     while True:
-        val = form_session.prompt("  Category: ").strip()
+        val = ask(_CATEGORY_PROMPT).strip()
         if not val:
             print("  Category is required.")
             continue
-        
+
         if val.isdigit():
             idx = int(val)
             if 1 <= idx <= len(categories):
                 return categories[idx - 1][0]
             print(f"    Invalid number: {idx}")
             continue
-        
+
         category_id = get_or_create_category(val)
-        if not any(c[1].lower() == val.lower() for c in categories):
+        invalidate_db_cache()
+        if val.lower() not in existing_names:
             print(f"    Created new category: '{val}'")
         return category_id
 
 def prompt_tags_for_category(category_id):
     """Prompt for tags within a specific category. Returns list of tag IDs."""
-    existing_tags = get_tags_for_category(category_id)
-    
+    existing_tags = cached_tags(category_id)
+
     print("\n  Tags for this category:")
     if existing_tags:
         for i, (id, name) in enumerate(existing_tags, 1):
@@ -170,12 +244,21 @@ def prompt_tags_for_category(category_id):
     print("  Enter numbers for existing, or type new names to create.")
     print("  Separate multiple with commas. Press Enter to skip.")
     
-    val = form_session.prompt("  Tags: ").strip()
+    val = form_session.prompt(_TAGS_PROMPT).strip()
     if not val:
         return []
-    
+
+    existing_names = {name.lower() for _, name in existing_tags}
+    parts = [p.strip() for p in val.split(",") if p.strip()]
+
+    # Upsert all typed names in one statement instead of one per tag.
+    new_names = [p for p in parts if not p.isdigit()]
+    created = get_or_create_tags(category_id, new_names) if new_names else {}
+    if new_names:
+        _db_cache["tags"].pop(category_id, None)
+
     tag_ids = []
-    for part in (p.strip() for p in val.split(",") if p.strip()):
+    for part in parts:
         if part.isdigit():
             idx = int(part)
             if 1 <= idx <= len(existing_tags):
@@ -183,20 +266,20 @@ def prompt_tags_for_category(category_id):
             else:
                 print(f"    Invalid number: {idx}")
         else:
-            tag_id = get_or_create_tag(category_id, part)
-            tag_ids.append(tag_id)
-            if not any(t[1].lower() == part.lower() for t in existing_tags):
+            tag_ids.append(created[part.lower()])
+            if part.lower() not in existing_names:
                 print(f"    Created new tag: '{part}'")
-    
+
     return tag_ids
 
 def prompt_date(prompt_text, default=None, required=True):
     hint = "(YYYY-MM-DD, 'today', 'yesterday', '-N')"
     default_str = str(default) if isinstance(default, date) else default
     prompt_text = f"{prompt_text} {hint} [{default_str}]: " if default else f"{prompt_text} {hint}: "
-    
+    ask = form_session.prompt
+
     while True:
-        val = form_session.prompt(prompt_text).strip().lower()
+        val = ask(prompt_text).strip().lower()
         
         if not val:
             if default:
@@ -210,8 +293,9 @@ def prompt_date(prompt_text, default=None, required=True):
             return date.today()
         if val in ("yesterday", "y"):
             return date.today() - timedelta(days=1)
-        if re.match(r'^-\d+$', val):
-            days = int(val[1:])
+        neg_match = _NEG_DAYS_RE.match(val)
+        if neg_match:
+            days = int(neg_match.group(1))
             if days == 0:
                 return date.today()
             return date.today() - timedelta(days=days)
@@ -233,8 +317,9 @@ def prompt_date_range(start_prompt="Start date", end_prompt="End date", default_
 
 def prompt_int(prompt_text, default=None, min_val=None, max_val=None):
     prompt_text = f"{prompt_text} [{default}]: " if default is not None else f"{prompt_text}: "
+    ask = form_session.prompt
     while True:
-        val = form_session.prompt(prompt_text).strip()
+        val = ask(prompt_text).strip()
         if not val and default is not None:
             return default
         try:
@@ -256,17 +341,19 @@ def prompt_select_activity(target_date=None, prompt_text="Select activity"):
     if not activities:
         return None, "empty"
     
-    print(f"\n  {prompt_text}:")
+    lines = [f"\n  {prompt_text}:"]
     for i, row in enumerate(activities, 1):
-        id, start, end, desc = row[0], row[1], row[2], row[3]
-        color = row[7] if len(row) > 7 else None
-        line = f"    {i}. {start.strftime('%m/%d')} {format_time(start)}-{format_time(end)} | {desc[:30]}"
-        if color:
-            line = color(line, color)
-        print(line)
-    
+        start, end = row.start_time, row.end_time
+        line = (f"    {i}. {start.month:02d}/{start.day:02d} "
+                f"{format_time_prompt(start)}-{format_time_prompt(end)} | {row.category_name[:30]}")
+        if row.category_color:
+            line = color(line, row.category_color)
+        lines.append(line)
+    print("\n".join(lines))
+    
+    ask = form_session.prompt
     while True:
-        val = form_session.prompt("  Enter number (or 'c' to cancel): ").strip()
+        val = ask("  Enter number (or 'c' to cancel): ").strip()
         if val.lower() == 'c':
             return None, "cancelled"
         try:
@@ -283,8 +370,9 @@ def prompt_color():
         print(line)
     print("  Or enter 'none' to clear color")
     
+    ask = form_session.prompt
     while True:
-        val = form_session.prompt("  Color: ").strip().lower()
+        val = ask("  Color: ").strip().lower()
         
         if not val:
             return None
@@ -298,7 +386,7 @@ def prompt_color():
             return presets[val]
         
         # Validate hex format
-        if re.match(r'^#[0-9A-Fa-f]{6}$', val):
+        if _HEX_RE.match(val):
             return val
         
         print("  Invalid color. Use preset name, #RRGGBB format, or 'none'.")
@@ -361,13 +449,12 @@ def cmd_edit():
     if status == "cancelled":
         return ["Cancelled."]
     
-    # Handle both 7 and 8-tuple formats
-    activity_id = activity[0]
-    start_dt = activity[1]
-    end_dt = activity[2]
-    category = activity[3]
-    tags = activity[5]
-    notes = activity[6]
+    activity_id = activity.id
+    start_dt = activity.start_time
+    end_dt = activity.end_time
+    category = activity.category_name
+    tags = activity.tags
+    notes = activity.notes
     
     activity_details = get_activity(activity_id)
     
@@ -390,14 +477,12 @@ def cmd_edit():
             break
         print("  End time must be after start time.")
     
+    category_id = activity_details['category_id']
     if prompt_yes_no("Update category?", default=False):
-        update_activity_category(activity_id, prompt_category())
-        if prompt_yes_no("Update tags?", default=False):
-            activity_details = get_activity(activity_id)
-            update_activity_tags(activity_id, prompt_tags_for_category(activity_details['category_id']))
-    elif prompt_yes_no("Update tags?", default=False):
-        activity_details = get_activity(activity_id)
-        update_activity_tags(activity_id, prompt_tags_for_category(activity_details['category_id']))
+        category_id = prompt_category()
+        update_activity_category(activity_id, category_id)
+    if prompt_yes_no("Update tags?", default=False):
+        update_activity_tags(activity_id, prompt_tags_for_category(category_id))
     
     new_notes = prompt_str("Notes", required=False, default=notes or "")
     
@@ -422,9 +507,9 @@ def cmd_delete():
     if status == "cancelled":
         return ["Cancelled."]
     
-    activity_details = get_activity(activity[0])
+    activity_details = get_activity(activity.id)
     if not activity_details:
-        return [f"Activity {activity[0]} not found."]
+        return [f"Activity {activity.id} not found."]
     
     print(f"\n  About to delete:")
     print(f"    Date: {activity_details['start_time'].date()}")
@@ -438,72 +523,57 @@ def cmd_delete():
     if not prompt_yes_no("Are you sure?", default=False):
         return ["Cancelled."]
     
-    result = delete_activity(activity[0])
+    result = delete_activity(activity.id)
     return [f"Deleted activity from {activity_details['start_time'].date()}"] if result else ["Failed to delete activity."]
 
+def _view_day(target, label=""):
+    rows = get_activities_by_date(target)
+    return [f"Activities for {target}{label}", ""] + format_activities_table(rows, show_date=False)
+
+def _view_span(start, end, label=""):
+    rows = get_activities_in_range(start, end)
+    return [f"Activities for {start} to {end}{label}", ""] + format_activities_table(rows, show_date=True)
+
+def _view_week(today, weeks_ago):
+    start_of_this_week = today - timedelta(days=today.weekday())
+    if weeks_ago == 0:
+        return _view_span(start_of_this_week, today, " (this week)")
+    start = start_of_this_week - timedelta(weeks=weeks_ago)
+    label = " (last week)" if weeks_ago == 1 else f" ({weeks_ago} weeks ago)"
+    return _view_span(start, start + timedelta(days=6), label)
+
 def cmd_view():
     """Unified view command."""
     print("\n── View Activities ──")
     print("  Enter: date, t/today, y/yesterday, -N (N days ago),")
     print("         w (this week), w-N (N weeks ago), r/range (date range)")
-    
+
     val = form_session.prompt("  View: ").strip().lower()
     today = date.today()
-    
-    # Empty or today
-    if not val or val in ("t", "today"):
-        rows = get_activities_by_date(today)
-        return [f"Activities for {today} (today)", ""] + format_activities_table(rows, show_date=False)
-    
-    # yesterday
-    if val in ("y", "yesterday"):
-        yesterday = today - timedelta(days=1)
-        rows = get_activities_by_date(yesterday)
-        return [f"Activities for {yesterday} (yesterday)", ""] + format_activities_table(rows, show_date=False)
-    
-    # -N days ago
-    if re.match(r'^-\d+$', val):
-        days = int(val[1:])
-        target = today - timedelta(days=days) if days > 0 else today
-        rows = get_activities_by_date(target)
-        return [f"Activities for {target}", ""] + format_activities_table(rows, show_date=False)
-    
-    # this week
-    if val == "w":
-        start_of_week = today - timedelta(days=today.weekday())
-        rows = get_activities_in_range(start_of_week, today)
-        return [f"Activities for {start_of_week} to {today} (this week)", ""] + format_activities_table(rows, show_date=True)
-    
-    # N weeks ago
-    week_match = re.match(r'^w\s*-?\s*(\d+)$', val)
-    if week_match:
-        weeks_ago = int(week_match.group(1))
-        if weeks_ago == 0:
-            start_of_week = today - timedelta(days=today.weekday())
-            rows = get_activities_in_range(start_of_week, today)
-            return [f"Activities for {start_of_week} to {today} (this week)", ""] + format_activities_table(rows, show_date=True)
-        
-        start_of_this_week = today - timedelta(days=today.weekday())
-        start_of_target_week = start_of_this_week - timedelta(weeks=weeks_ago)
-        end_of_target_week = start_of_target_week + timedelta(days=6)
-        rows = get_activities_in_range(start_of_target_week, end_of_target_week)
-        week_label = "last week" if weeks_ago == 1 else f"{weeks_ago} weeks ago"
-        return [f"Activities for {start_of_target_week} to {end_of_target_week} ({week_label})", ""] + format_activities_table(rows, show_date=True)
-    
-    # range
-    if val in ("r", "range"):
+
+    mode = _VIEW_ALIASES.get(val)
+    if mode == "today":
+        return _view_day(today, " (today)")
+    if mode == "yesterday":
+        return _view_day(today - timedelta(days=1), " (yesterday)")
+    if mode == "week":
+        return _view_week(today, 0)
+    if mode == "range":
         start, end = prompt_date_range("Start date", "End date", default_end=today)
-        rows = get_activities_in_range(start, end)
-        return [f"Activities for {start} to {end}", ""] + format_activities_table(rows, show_date=True)
-    
-    # try to parse as a date
-    try:
-        target = date.fromisoformat(val)
-        rows = get_activities_by_date(target)
-        return [f"Activities for {target}", ""] + format_activities_table(rows, show_date=False)
-    except ValueError:
-        pass
-    
+        return _view_span(start, end)
+
+    match = _VIEW_RE.match(val)
+    if match:
+        if match.group("days") is not None:
+            days = int(match.group("days"))
+            return _view_day(today - timedelta(days=days) if days else today)
+        if match.group("weeks") is not None:
+            return _view_week(today, int(match.group("weeks")))
+        try:
+            return _view_day(date.fromisoformat(match.group("iso")))
+        except ValueError:
+            pass
+
     return ["Invalid input. Use: date, t/today, y/yesterday, -N, w, w-N, r/range"]
 
 def cmd_report():
@@ -549,14 +619,15 @@ def cmd_report():
         if not rows:
             return [f"No data between {start} and {end}"]
         
-        total_minutes = sum(r[3] for r in rows)
+        # Percentage and grand total come back from the query's window columns.
+        total_minutes = rows[0][5] or 0
+        _fmt_dur = format_duration
         formatted = []
         colors = []
-        
-        for name, color, count, mins in rows:
-            pct = f"{mins/total_minutes*100:.1f}%" if total_minutes else "0%"
-            formatted.append((name, count, format_duration(mins), pct))
-            colors.append(color)
+
+        for name, cat_color, count, mins, pct, _total in rows:
+            formatted.append((name, count, _fmt_dur(mins), f"{pct}%" if pct is not None else "0%"))
+            colors.append(cat_color)
         
         lines = [f"Time by Category: {start} to {end}", ""]
         lines.extend(format_table(["Category", "Activities", "Duration", "% of Total"], formatted, colors))
@@ -568,12 +639,13 @@ def cmd_report():
         if not rows:
             return [f"No tagged activities between {start} and {end}"]
         
+        _fmt_dur = format_duration
         formatted = []
         colors = []
-        
-        for cat, color, tag, count, mins in rows:
-            formatted.append((cat, tag, count, format_duration(mins)))
-            colors.append(color)
+
+        for cat, cat_color, tag, count, mins in rows:
+            formatted.append((cat, tag, count, _fmt_dur(mins)))
+            colors.append(cat_color)
         
         lines = [f"Time by Tag: {start} to {end}", ""]
         lines.extend(format_table(["Category", "Tag", "Activities", "Duration"], formatted, colors))
@@ -590,19 +662,19 @@ def cmd_manage():
     print("    5. Manage tags within a category")
     
     choice = form_session.prompt("  Select option (1-5): ").strip()
-    categories = get_all_categories()
+    categories = cached_categories()
     
     if choice == "1":
         if not categories:
             return ["No categories yet."]
         lines = ["Categories:"]
-        for id, name, color in categories:
-            tags = get_tags_for_category(id)
+        for id, name, cat_color in categories:
+            tags = cached_tags(id)
             tags_str = f" (tags: {', '.join(t[1] for t in tags)})" if tags else ""
-            color_str = f" [{color}]" if color else ""
+            color_str = f" [{cat_color}]" if cat_color else ""
             line = f"  [{id}] {name}{color_str}{tags_str}"
-            if color:
-                line = color(line, color)
+            if cat_color:
+                line = color(line, cat_color)
             lines.append(line)
         return lines
     
@@ -611,12 +683,13 @@ def cmd_manage():
             return ["No categories to modify."]
         
         action_name = {"2": "rename", "3": "delete", "4": "change color of"}[choice]
-        print(f"\n  Select category to {action_name}:")
-        for i, (id, name, color) in enumerate(categories, 1):
+        lines = [f"\n  Select category to {action_name}:"]
+        for i, (id, name, cat_color) in enumerate(categories, 1):
             line = f"    {i}. {name}"
-            if color:
-                line = color(line, color)
-            print(line)
+            if cat_color:
+                line = color(line, cat_color)
+            lines.append(line)
+        print("\n".join(lines))
         
         idx = prompt_int("Category number", min_val=1, max_val=len(categories))
         category_id, cat_name, old_color = categories[idx - 1]
@@ -639,12 +712,13 @@ def cmd_manage():
         if not categories:
             return ["No categories yet."]
         
-        print("\n  Select category:")
-        for i, (id, name, color) in enumerate(categories, 1):
+        lines = ["\n  Select category:"]
+        for i, (id, name, cat_color) in enumerate(categories, 1):
             line = f"    {i}. {name}"
-            if color:
-                line = color(line, color)
-            print(line)
+            if cat_color:
+                line = color(line, cat_color)
+            lines.append(line)
+        print("\n".join(lines))
         
         idx = prompt_int("Category number", min_val=1, max_val=len(categories))
         category_id, cat_name, _ = categories[idx - 1]
@@ -655,7 +729,7 @@ def cmd_manage():
         print("    3. Delete tag")
         
         action = form_session.prompt("  Select action (1-3): ").strip()
-        tags = get_tags_for_category(category_id)
+        tags = cached_tags(category_id)
         
         if action == "1":
             if not tags:
@@ -683,7 +757,7 @@ def cmd_manage():
     return ["Invalid option."]
 
 COMMAND_MAP = {
-    "help": lambda: [print_help()],
+    "help": print_help,
     "log": cmd_log,
     "edit": cmd_edit,
     "delete": cmd_delete,
@@ -692,15 +766,24 @@ COMMAND_MAP = {
     "manage": cmd_manage,
 }
 
+# Prefix -> matching commands, built once so dispatch is a single dict lookup.
+# The empty prefix lists every command so Tab on a blank prompt stays a menu.
+_PREFIX_INDEX = {"": list(COMMAND_MAP)}
+for _cmd in COMMAND_MAP:
+    for _i in range(1, len(_cmd) + 1):
+        _PREFIX_INDEX.setdefault(_cmd[:_i], []).append(_cmd)
+
 def process_command(cmd):
     cmd = cmd.strip().lower()
     if not cmd:
         return []
-    
+
+    invalidate_db_cache()
+
     if cmd in COMMAND_MAP:
         return COMMAND_MAP[cmd]()
-    
-    matches = [c for c in COMMAND_MAP if c.startswith(cmd)]
+
+    matches = _PREFIX_INDEX.get(cmd, [])
     if len(matches) == 1:
         return COMMAND_MAP[matches[0]]()
     if len(matches) > 1:
@@ -711,12 +794,13 @@ def process_command(cmd):
 def main():
     global cmd_session, form_session
     
-    cmd_session = PromptSession(completer=WordCompleter(COMMANDS, ignore_case=True, sentence=True), key_bindings=kb)
+    cmd_session = PromptSession(completer=CommandCompleter(), key_bindings=kb)
     form_session = PromptSession(key_bindings=kb)
-    
-    print(header_line())
+
+    header = header_line(shutil.get_terminal_size(fallback=(80, 24)).columns)
+    print(header)
     print("  TASK LOGGER")
-    print(header_line())
+    print(header)
     print("\nConnecting to database...")
     
     if not setup_database():
@@ -740,7 +824,7 @@ def main():
                 render()
         except AbortInput:
             reset_ui()
-            add_ui("Cancelled.")
+            add_ui(["Cancelled."])
             render()
         except (EOFError, KeyboardInterrupt):
             print("\n\nGoodbye!")
@@ -1,6 +1,8 @@
 import psycopg2
-from psycopg2 import Error
+from psycopg2 import Error, pool
 from contextlib import contextmanager
+import atexit
+import hashlib
 import os
 
 try:
@@ -10,7 +12,32 @@ except ImportError as e:
     exit(1)
 
 
+# Shared pool for the main database; created lazily so admin commands that
+# never touch it (e.g. --reset before the DB exists) don't pay for it.
+_POOL = None
+
+
+def _get_pool():
+    global _POOL
+    if _POOL is None:
+        try:
+            _POOL = pool.ThreadedConnectionPool(
+                minconn=1,
+                maxconn=8,
+                host=DB_HOST,
+                port=DB_PORT,
+                database=DB_NAME,
+                user=DB_USER,
+                password=DB_PASSWORD,
+            )
+        except Error:
+            return None
+        atexit.register(_POOL.closeall)
+    return _POOL
+
+
 def get_connection(db_name=DB_NAME):
+    """Open a dedicated connection (admin/setup paths; queries use the pool)."""
     try:
         conn = psycopg2.connect(
             host=DB_HOST,
@@ -25,26 +52,38 @@ def get_connection(db_name=DB_NAME):
 
 
 @contextmanager
-def get_cursor(write=True, db_name=DB_NAME):
-    conn = None
+def get_cursor(write=True, name=None):
+    """Yield a cursor on a pooled connection.
+
+    Pass `name` for a server-side cursor that streams rows in batches
+    instead of materialising the whole result set server-side at once.
+    """
+    db_pool = _get_pool()
+    if db_pool is None:
+        raise Exception("Failed to connect to database")
+
+    conn = db_pool.getconn()
     cursor = None
+    broken = False
     try:
-        conn = get_connection(db_name)
-        if conn is None:
-            raise Exception("Failed to connect to database")
-        cursor = conn.cursor()
+        cursor = conn.cursor(name=name) if name else conn.cursor()
+        if name:
+            cursor.itersize = 500
         yield cursor
         if write:
             conn.commit()
+        else:
+            conn.rollback()
     except Exception as e:
-        if conn:
+        try:
             conn.rollback()
+        except Error:
+            broken = True  # Connection is unusable; evict it from the pool.
         raise e
     finally:
-        if cursor:
+        if cursor and not conn.closed:
             cursor.close()
-        if conn:
-            conn.close()
+        db_pool.putconn(conn, close=broken or conn.closed)
 
 
 def test_connection(db_name=DB_NAME):
@@ -82,31 +121,38 @@ def create_database():
             conn.close()
 
 
-def init_schema():
-    """Initialize/update the database schema from ddl.sql."""
+def init_schema(conn=None):
+    """Initialize/update the database schema from ddl.sql.
+
+    Reuses `conn` when given (caller keeps ownership); otherwise opens and
+    closes its own connection.
+    """
     ddl_path = os.path.join(os.path.dirname(__file__), "ddl.sql")
-    
+
     if not os.path.exists(ddl_path):
         print(f"ddl.sql not found at {ddl_path}")
         return False
-    
+
+    own_conn = conn is None
     try:
         with open(ddl_path, "r") as f:
             ddl_sql = f.read()
-        
-        conn = get_connection()
+
+        if own_conn:
+            conn = get_connection()
         if conn is None:
             print("Could not connect to database.")
             return False
-        
+
         try:
             conn.autocommit = True
             with conn.cursor() as cursor:
                 cursor.execute(ddl_sql)
             return True
         finally:
-            conn.close()
-            
+            if own_conn:
+                conn.close()
+
     except Error as e:
         print(f"Error initializing schema: {e}")
         return False
@@ -139,12 +185,66 @@ def reset_database():
         return False
 
 
+# Marker recording that this exact schema was applied to this database, so
+# warm startups can skip replaying ddl.sql entirely.
+_MARKER_PATH = os.path.expanduser(os.path.join("~", ".task-logger", "initialized"))
+
+
+def _schema_fingerprint():
+    """Hash of the target database identity plus the current ddl.sql, or None."""
+    ddl_path = os.path.join(os.path.dirname(__file__), "ddl.sql")
+    try:
+        with open(ddl_path, "rb") as f:
+            ddl = f.read()
+    except OSError:
+        return None
+    ident = f"{DB_HOST}:{DB_PORT}/{DB_NAME}\n".encode()
+    return hashlib.sha256(ident + ddl).hexdigest()
+
+
+def _marker_matches(fingerprint):
+    try:
+        with open(_MARKER_PATH) as f:
+            return f.read().strip() == fingerprint
+    except OSError:
+        return False
+
+
+def _write_marker(fingerprint):
+    try:
+        os.makedirs(os.path.dirname(_MARKER_PATH), exist_ok=True)
+        with open(_MARKER_PATH, "w") as f:
+            f.write(fingerprint + "\n")
+    except OSError:
+        pass  # The marker is only an optimization; setup itself succeeded.
+
+
 def setup_database():
     """Full database setup: create database and initialize/update schema."""
-    if not create_database():
-        return False
-    if not init_schema():
-        return False
+    # Warm path: this schema was already applied to this database and it
+    # still answers — skip the DDL replay entirely.
+    fingerprint = _schema_fingerprint()
+    if fingerprint and _marker_matches(fingerprint) and test_connection():
+        return True
+
+    # Common path: the database already exists, so connect straight to it and
+    # apply the schema over that one connection. Only fall back to the admin
+    # connection (CREATE DATABASE) when the direct connect fails.
+    conn = get_connection()
+    if conn is None:
+        if not create_database():
+            return False
+        conn = get_connection()
+        if conn is None:
+            print("Could not connect to database.")
+            return False
+    try:
+        if not init_schema(conn):
+            return False
+    finally:
+        conn.close()
+    if fingerprint:
+        _write_marker(fingerprint)
     print("Database ready.")
     return True
 
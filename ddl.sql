@@ -33,6 +33,11 @@ CREATE TABLE IF NOT EXISTS activities (
     CONSTRAINT valid_time_range CHECK (end_time > start_time)
 );
 
+-- Duration is computed once at write time; queries and views SUM the stored
+-- integer instead of re-running EXTRACT(EPOCH ...) per row.
+ALTER TABLE activities ADD COLUMN IF NOT EXISTS duration_minutes INTEGER
+    GENERATED ALWAYS AS (EXTRACT(EPOCH FROM (end_time - start_time))::INTEGER / 60) STORED;
+
 -- Many-to-many: activities <-> tags
 CREATE TABLE IF NOT EXISTS activity_tags (
     activity_id INTEGER NOT NULL REFERENCES activities(id) ON DELETE CASCADE,
@@ -48,10 +53,29 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_categories_name_lower ON categories(LOWER(
 CREATE UNIQUE INDEX IF NOT EXISTS idx_tags_name_lower ON tags(category_id, LOWER(name));
 CREATE INDEX IF NOT EXISTS idx_activities_start_time ON activities(start_time);
 CREATE INDEX IF NOT EXISTS idx_activities_end_time ON activities(end_time);
-CREATE INDEX IF NOT EXISTS idx_activities_start_date ON activities(DATE(start_time));
+-- Superseded: date filters compare start_time directly now, so the
+-- DATE(start_time) expression index has no readers left.
+DROP INDEX IF EXISTS idx_activities_start_date;
 CREATE INDEX IF NOT EXISTS idx_activities_category ON activities(category_id);
+-- Activities arrive in rough time order, so a BRIN gives near-free block
+-- elimination for multi-month report scans at a fraction of the btree's size.
+CREATE INDEX IF NOT EXISTS idx_activities_start_brin ON activities USING BRIN (start_time) WITH (pages_per_range = 32);
 CREATE INDEX IF NOT EXISTS idx_tags_category ON tags(category_id);
-CREATE INDEX IF NOT EXISTS idx_activity_tags_tag_id ON activity_tags(tag_id);
+-- The primary key covers the activity->tag direction; this covers tag->activity
+-- so joins from tags (report_tags, tag_stats) are index-only in both directions.
+DROP INDEX IF EXISTS idx_activity_tags_tag_id;
+CREATE INDEX IF NOT EXISTS idx_activity_tags_tag_activity ON activity_tags(tag_id, activity_id);
+
+-- Activities must not overlap: enforced in the database so the INSERT
+-- itself detects conflicts atomically (no preflight SELECT, no race).
+-- tsrange matches the TIMESTAMP columns; '[)' lets activities touch.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'no_overlap') THEN
+        ALTER TABLE activities ADD CONSTRAINT no_overlap
+            EXCLUDE USING gist (tsrange(start_time, end_time, '[)') WITH &&);
+    END IF;
+END $$;
 
 -- ============================================================
 -- FUNCTIONS (drop and recreate to allow updates)
@@ -96,7 +120,7 @@ SELECT
     c.name AS category_name,
     c.color AS category_color,
     a.notes,
-    EXTRACT(EPOCH FROM (a.end_time - a.start_time))::INTEGER / 60 AS duration_minutes,
+    a.duration_minutes,
     COALESCE(STRING_AGG(t.name, ', ' ORDER BY t.name), '') AS tags,
     a.created_at,
     a.updated_at
@@ -114,9 +138,7 @@ SELECT
     c.name,
     c.color,
     COUNT(a.id) AS activity_count,
-    COALESCE(SUM(
-        EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 60
-    ), 0)::INTEGER AS total_minutes
+    COALESCE(SUM(a.duration_minutes), 0)::INTEGER AS total_minutes
 FROM categories c
 LEFT JOIN activities a ON c.id = a.category_id
 GROUP BY c.id
@@ -131,9 +153,7 @@ SELECT
     c.name AS category_name,
     c.color AS category_color,
     COUNT(at.activity_id) AS activity_count,
-    COALESCE(SUM(
-        EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 60
-    ), 0)::INTEGER AS total_minutes
+    COALESCE(SUM(a.duration_minutes), 0)::INTEGER AS total_minutes
 FROM tags t
 JOIN categories c ON t.category_id = c.id
 LEFT JOIN activity_tags at ON t.id = at.tag_id
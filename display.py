@@ -1,10 +1,13 @@
 import shutil
 from datetime import datetime, date
+from itertools import chain
+from functools import lru_cache
 
 # ANSI color codes
 RESET = "\033[0m"
 BOLD = "\033[1m"
 
+@lru_cache(maxsize=64)
 def hex_to_ansi(hex_color):
     """Convert hex color (#RRGGBB) to ANSI 24-bit color code."""
     if not hex_color or not hex_color.startswith('#'):
@@ -17,18 +20,18 @@ def hex_to_ansi(hex_color):
     except (ValueError, IndexError):
         return ""
 
+@lru_cache(maxsize=128)
+def _ansi_affixes(hex_color, bold):
+    """Precomputed (prefix, suffix) pair for a color/bold combination."""
+    prefix = (BOLD if bold else "") + (hex_to_ansi(hex_color) if hex_color else "")
+    return prefix, RESET if prefix else ""
+
 def color(text, hex_color=None, bold=False):
     """Print text with optional color and bold."""
-    output = ""
-    if bold:
-        output += BOLD
-    if hex_color:
-        output += hex_to_ansi(hex_color)
-    output += text
-    if hex_color or bold:
-        output += RESET
-    return output
+    pre, post = _ansi_affixes(hex_color, bool(bold))
+    return f"{pre}{text}{post}"
 
+@lru_cache(maxsize=512)
 def format_duration(minutes):
     """Format minutes as 'Xh Ym' or 'Ym'."""
     if not minutes:
@@ -36,10 +39,15 @@ def format_duration(minutes):
     hours, mins = divmod(minutes, 60)
     return f"{hours}h {mins}m" if hours else f"{mins}m"
 
+@lru_cache(maxsize=1024)
+def _strftime_time(ts):
+    return ts.strftime("%I:%M%p").lstrip("0").lower()
+
 def format_time(ts):
     """Format timestamp as '9:30am'."""
-    return ts.strftime("%I:%M%p").lstrip("0").lower() if isinstance(ts, datetime) else (str(ts) if ts else "")
+    return _strftime_time(ts) if isinstance(ts, datetime) else (str(ts) if ts else "")
 
+@lru_cache(maxsize=512)
 def format_date_short(ts):
     """Format date as 'MM/DD'."""
     return ts.strftime("%m/%d") if isinstance(ts, (datetime, date)) else (str(ts) if ts else "")
@@ -56,27 +64,32 @@ def format_table(headers, rows, colors=None):
     Returns:
         List of formatted lines
     """
-    rows = list(rows)
-    if not rows:
+    # Stringify once and compute column widths in a single pass
+    headers = [str(h) for h in headers]
+    widths = [len(h) for h in headers]
+    str_rows = []
+    for row in rows:
+        cells = [str(c) if c else "" for c in row]
+        str_rows.append(cells)
+        for i, cell in enumerate(cells):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+
+    if not str_rows:
         return ["(no data)"]
-    
-    # Calculate column widths
-    widths = [max(len(str(h)), max(len(str(cell) if cell else "") for cell in col)) 
-              for h, col in zip(headers, zip(*rows))]
-    
-    fmt = " | ".join(f"{{:<{w}}}" for w in widths)
+
     sep = "-+-".join("-" * w for w in widths)
-    
+
     # Format header
-    lines = [fmt.format(*headers), sep]
-    
+    lines = [" | ".join(h.ljust(w) for h, w in zip(headers, widths)), sep]
+
     # Format rows with optional colors
-    for i, row in enumerate(rows):
-        row_str = fmt.format(*(str(c) if c else "" for c in row))
+    for i, cells in enumerate(str_rows):
+        row_str = " | ".join(c.ljust(w) for c, w in zip(cells, widths))
         if colors and i < len(colors) and colors[i]:
             row_str = color(row_str, colors[i])
         lines.append(row_str)
-    
+
     return lines
 
 def format_activities_table(rows, show_date=False):
@@ -90,36 +103,53 @@ def format_activities_table(rows, show_date=False):
     Returns:
         List of formatted lines
     """
-    if not rows:
+    rows_iter = iter(rows)
+    try:
+        first = next(rows_iter)
+    except StopIteration:
         return ["No activities found."]
-    
+
     formatted = []
     colors = []
-    total_minutes = 0
-    
-    for row in rows:
-        # Handle both 7-tuple (no color) and 8-tuple (with color) formats
-        if len(row) == 8:
-            id, start, end, category, dur, tags, notes, color = row
-        else:
-            id, start, end, category, dur, tags, notes = row
-            color = None
-        
-        start_str = f"{format_date_short(start)} {format_time(start)}" if show_date else format_time(start)
+    # Query rows carry the grand total as a trailing window-SUM column;
+    # fall back to accumulating for plain 7/8-tuples.
+    total_minutes = first[8] if len(first) > 8 else None
+    accumulated = 0
+
+    # Hoist the per-row lookups and the show_date branch out of the loop.
+    _fmt_time = format_time
+    _fmt_dur = format_duration
+    if show_date:
+        start_fmt = lambda s: f"{format_date_short(s)} {_fmt_time(s)}"
+    else:
+        start_fmt = _fmt_time
+
+    for row in chain((first,), rows_iter):
+        id, start, end, category, dur, tags, notes = row[:7]
+        color = row[7] if len(row) > 7 else None
+
+        start_str = start_fmt(start)
         
         # Format category/tags column
-        cat_tags = f"{category}: {tags[:20]}..." if tags and len(tags) > 20 else (f"{category}: {tags}" if tags else category)
-        cat_tags = cat_tags[:30] + "..." if len(cat_tags) > 30 else cat_tags
-        
+        if tags:
+            cat_tags = f"{category}: {tags if len(tags) <= 20 else tags[:20] + '...'}"
+        else:
+            cat_tags = category
+        if len(cat_tags) > 30:
+            cat_tags = cat_tags[:30] + "..."
+
         # Format notes
         notes_display = (notes[:20] + "..." if len(notes) > 20 else notes) if notes else "-"
         
-        formatted.append((id, start_str, format_time(end), format_duration(dur), cat_tags, notes_display))
+        formatted.append((id, start_str, _fmt_time(end), _fmt_dur(dur), cat_tags, notes_display))
         colors.append(color)
-        total_minutes += dur or 0
-    
+        if total_minutes is None:
+            accumulated += dur or 0
+
+    if total_minutes is None:
+        total_minutes = accumulated
     lines = format_table(["ID", "Start", "End", "Duration", "Category/Tags", "Notes"], formatted, colors)
-    lines.extend(["", f"Total: {len(rows)} activities, {format_duration(total_minutes)}"])
+    lines.extend(["", f"Total: {len(formatted)} activities, {format_duration(total_minutes)}"])
     return lines
 
 def format_categories_list(categories, show_stats=False):
@@ -139,25 +169,23 @@ def format_categories_list(categories, show_stats=False):
     lines = []
     for cat in categories:
         if show_stats and len(cat) >= 5:
-            id, name, color, count, minutes = cat[:5]
+            id, name, cat_color, count, minutes = cat[:5]
             stat_str = f" ({count} activities, {format_duration(minutes)})"
         else:
-            id, name, color = cat[:3]
+            id, name, cat_color = cat[:3]
             stat_str = ""
-        
-        color_indicator = f" [{color}]" if color else ""
+
+        color_indicator = f" [{cat_color}]" if cat_color else ""
         line = f"  [{id}] {name}{color_indicator}{stat_str}"
-        
-        if color:
-            line = color(line, color)
-        
+
+        if cat_color:
+            line = color(line, cat_color)
+
         lines.append(line)
-    
+
     return lines
 
-def print_help():
-    """Return help text."""
-    return """
+_HELP_TEXT = """
 ┌────────────────────────────────────────────────────────────────────────┐
 │                           TASK LOGGER                                  │
 ├────────────────────────────────────────────────────────────────────────┤
@@ -193,26 +221,31 @@ def print_help():
 └────────────────────────────────────────────────────────────────────────┘
 """
 
+def print_help():
+    """Return the help screen as a list of display lines."""
+    return _HELP_TEXT.splitlines()
+
+COLOR_SAMPLES = {
+    "red": "#E74C3C",
+    "blue": "#3498DB",
+    "green": "#2ECC71",
+    "yellow": "#F1C40F",
+    "purple": "#9B59B6",
+    "orange": "#E67E22",
+    "pink": "#FD79A8",
+    "cyan": "#00CEC9",
+    "gray": "#95A5A6",
+    "brown": "#8B4513",
+}
+
 def get_color_samples():
     """Return a dict of named color samples."""
-    return {
-        "red": "#E74C3C",
-        "blue": "#3498DB",
-        "green": "#2ECC71",
-        "yellow": "#F1C40F",
-        "purple": "#9B59B6",
-        "orange": "#E67E22",
-        "pink": "#FD79A8",
-        "cyan": "#00CEC9",
-        "gray": "#95A5A6",
-        "brown": "#8B4513",
-    }
+    return COLOR_SAMPLES
 
 def display_color_samples():
     """Display available color presets."""
-    samples = get_color_samples()
     lines = ["  Color presets (or enter custom #RRGGBB):"]
-    for name, hex_val in samples.items():
+    for name, hex_val in COLOR_SAMPLES.items():
         colored_sample = color(f"    {name:8} {hex_val}", hex_val, bold=True)
         lines.append(colored_sample)
     return lines
\ No newline at end of file
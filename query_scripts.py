@@ -1,27 +1,40 @@
 from db import get_cursor
-from datetime import datetime, date
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+from collections import namedtuple
+from datetime import datetime, date, timedelta
+import weakref
+
+# Row shape returned by _get_activities; attribute access keeps consumers
+# free of positional indexing.
+ActivityRow = namedtuple("ActivityRow", [
+    "id", "start_time", "end_time", "category_name",
+    "duration_minutes", "tags", "notes", "category_color",
+    "total_minutes",  # window SUM over the whole result set, same on every row
+])
 
 def _get_or_create(table, name, extra_cols=None, extra_vals=None):
-    """Generic get-or-create for categories/tags."""
+    """Generic get-or-create for categories/tags as a single upsert.
+
+    The ON CONFLICT target is the case-insensitive unique index, and the
+    no-op DO UPDATE makes RETURNING yield the existing row on conflict;
+    xmax = 0 distinguishes a fresh insert from a hit.
+    """
     name = name.strip()
-    where_clause = "LOWER(name) = LOWER(%s)"
-    where_params = [name]
-    
-    if extra_cols:
-        where_clause = f"{extra_cols[0]} = %s AND " + where_clause
-        where_params = [extra_vals[0]] + where_params
-    
+    cols = ["name"] + (extra_cols or [])
+    vals = [name] + (extra_vals or [])
+    placeholders = ", ".join(["%s"] * len(vals))
+    conflict = f"({extra_cols[0]}, LOWER(name))" if extra_cols else "(LOWER(name))"
+
     with get_cursor(write=True) as cursor:
-        cursor.execute(f"SELECT id FROM {table} WHERE {where_clause}", where_params)
-        existing = cursor.fetchone()
-        if existing:
-            return existing[0], False
-        
-        cols = ["name"] + (extra_cols or [])
-        vals = [name] + (extra_vals or [])
-        placeholders = ", ".join(["%s"] * len(vals))
-        cursor.execute(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders}) RETURNING id", vals)
-        return cursor.fetchone()[0], True
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})"
+            f" ON CONFLICT {conflict} DO UPDATE SET name = {table}.name"
+            " RETURNING id, (xmax = 0)",
+            vals,
+        )
+        row_id, created = cursor.fetchone()
+        return row_id, created
 
 def _rename(table, id, new_name):
     """Generic rename for categories/tags."""
@@ -29,14 +42,13 @@ def _rename(table, id, new_name):
         cursor.execute(f"UPDATE {table} SET name = %s WHERE id = %s", (new_name.strip(), id))
     return [f"Renamed to '{new_name}'"]
 
-def _delete(table, id, name_query="SELECT name FROM {table} WHERE id = %s"):
+def _delete(table, id):
     """Generic delete for tags."""
     with get_cursor(write=True) as cursor:
-        cursor.execute(name_query.format(table=table), (id,))
+        cursor.execute(f"DELETE FROM {table} WHERE id = %s RETURNING name", (id,))
         row = cursor.fetchone()
         if not row:
             return [f"Not found"]
-        cursor.execute(f"DELETE FROM {table} WHERE id = %s", (id,))
     return [f"Deleted '{row[0]}'"]
 
 def get_all_categories():
@@ -45,12 +57,23 @@ def get_all_categories():
         cursor.execute("SELECT id, name, color FROM categories ORDER BY name")
         return cursor.fetchall()
 
+# Name -> id memos for the chained-log path. Ids are stable, so entries only
+# need clearing when a rename or delete changes what a name resolves to.
+_category_id_cache = {}
+_tag_id_cache = {}
+
 def get_or_create_category(name, color=None):
     """Create or get existing category."""
-    return _get_or_create("categories", name, ["color"], [color])[0]
+    key = name.strip().lower()
+    category_id = _category_id_cache.get(key)
+    if category_id is None:
+        category_id = _get_or_create("categories", name, ["color"], [color])[0]
+        _category_id_cache[key] = category_id
+    return category_id
 
 def rename_category(category_id, new_name):
     """Rename a category."""
+    _category_id_cache.clear()
     return _rename("categories", category_id, new_name)
 
 def update_category_color(category_id, color):
@@ -61,16 +84,23 @@ def update_category_color(category_id, color):
 
 def delete_category(category_id):
     """Delete category and all its activities."""
+    _category_id_cache.clear()
+    _tag_id_cache.clear()
     with get_cursor(write=True) as cursor:
-        cursor.execute("SELECT name FROM categories WHERE id = %s", (category_id,))
-        row = cursor.fetchone()
-        if not row:
+        cursor.execute(
+            """WITH deleted_activities AS (
+                   DELETE FROM activities WHERE category_id = %s RETURNING id
+               ), deleted_category AS (
+                   DELETE FROM categories WHERE id = %s RETURNING name
+               )
+               SELECT (SELECT name FROM deleted_category),
+                      (SELECT COUNT(*) FROM deleted_activities)""",
+            (category_id, category_id),
+        )
+        name, count = cursor.fetchone()
+        if name is None:
             return ["Category not found"]
-        
-        cursor.execute("SELECT COUNT(*) FROM activities WHERE category_id = %s", (category_id,))
-        count = cursor.fetchone()[0]
-        cursor.execute("DELETE FROM categories WHERE id = %s", (category_id,))
-    return [f"Deleted category '{row[0]}' and {count} activities"]
+    return [f"Deleted category '{name}' and {count} activities"]
 
 def get_tags_for_category(category_id):
     """Get all tags for a specific category."""
@@ -80,63 +110,114 @@ def get_tags_for_category(category_id):
 
 def get_or_create_tag(category_id, name):
     """Create or get existing tag within a category."""
-    return _get_or_create("tags", name, ["category_id"], [category_id])[0]
+    key = (category_id, name.strip().lower())
+    tag_id = _tag_id_cache.get(key)
+    if tag_id is None:
+        tag_id = _get_or_create("tags", name, ["category_id"], [category_id])[0]
+        _tag_id_cache[key] = tag_id
+    return tag_id
+
+def get_or_create_tags(category_id, names):
+    """Create or get several tags within a category in one upsert.
+
+    Returns {lowercased name: id}. Names that collide case-insensitively
+    are deduplicated; the stored casing wins for pre-existing tags.
+    """
+    deduped = {}
+    for name in names:
+        name = name.strip()
+        if name:
+            deduped.setdefault(name.lower(), name)
+    if not deduped:
+        return {}
+
+    with get_cursor(write=True) as cursor:
+        rows = execute_values(
+            cursor,
+            "INSERT INTO tags (category_id, name) VALUES %s"
+            " ON CONFLICT (category_id, LOWER(name)) DO UPDATE SET name = tags.name"
+            " RETURNING id, name",
+            [(category_id, name) for name in deduped.values()],
+            fetch=True,
+        )
+    resolved = {name.lower(): tag_id for tag_id, name in rows}
+    for lname, tag_id in resolved.items():
+        _tag_id_cache[(category_id, lname)] = tag_id
+    return resolved
 
 def rename_tag(tag_id, new_name):
     """Rename a tag."""
+    _tag_id_cache.clear()
     return _rename("tags", tag_id, new_name)
 
 def delete_tag(tag_id):
     """Delete a tag."""
+    _tag_id_cache.clear()
     return _delete("tags", tag_id)
 
+# Statements hot enough that re-parsing/planning on every call shows up;
+# prepared lazily, once per pooled connection.
+_PREPARED_STATEMENTS = {
+    # The && predicate matches the no_overlap constraint's GiST expression
+    # index, so the lookup descends the range index instead of btree-scanning
+    # two one-sided bounds.
+    "overlap_check": (
+        "SELECT id, start_time, end_time FROM activities"
+        " WHERE tsrange(start_time, end_time, '[)') && tsrange($1, $2, '[)')"
+    ),
+    "overlap_check_excl": (
+        "SELECT id, start_time, end_time FROM activities"
+        " WHERE tsrange(start_time, end_time, '[)') && tsrange($1, $2, '[)') AND id != $3"
+    ),
+}
+
+_prepared_conns = weakref.WeakSet()
+
+def _ensure_prepared(cursor):
+    """PREPARE the hot statements on this cursor's connection, once."""
+    conn = cursor.connection
+    if conn in _prepared_conns:
+        return
+    for name, sql in _PREPARED_STATEMENTS.items():
+        cursor.execute(f"PREPARE {name} AS {sql}")
+    conn.commit()  # PREPARE is transactional; persist past the read-path rollback
+    _prepared_conns.add(conn)
+
 def check_overlap_range(start_time, end_time, exclude_id=None):
     """Check if the range overlaps with any existing activity."""
     with get_cursor(write=False) as cursor:
-        query = "SELECT id, start_time, end_time FROM activities WHERE start_time < %s AND end_time > %s"
-        params = [end_time, start_time]
+        _ensure_prepared(cursor)
         if exclude_id:
-            query += " AND id != %s"
-            params.append(exclude_id)
-        cursor.execute(query + " ORDER BY start_time", params)
-        return cursor.fetchall()
+            cursor.execute("EXECUTE overlap_check_excl(%s, %s, %s)", (start_time, end_time, exclude_id))
+        else:
+            cursor.execute("EXECUTE overlap_check(%s, %s)", (start_time, end_time))
+        # Sort the (tiny) conflict set here so the query plan doesn't have to.
+        return sorted(cursor.fetchall(), key=lambda row: row[1])
 
 def log_activity(start_time, end_time, category_id, tag_ids=None, notes=None):
-    """Log a new activity."""
-    overlaps = check_overlap_range(start_time, end_time)
-    if overlaps:
-        raise ValueError(overlaps)
-    
-    with get_cursor(write=True) as cursor:
-        cursor.execute(
-            "INSERT INTO activities (start_time, end_time, category_id, notes) VALUES (%s, %s, %s, %s) RETURNING id",
-            (start_time, end_time, category_id, notes or None),
-        )
-        activity_id = cursor.fetchone()[0]
-        
-        for tag_id in (tag_ids or []):
+    """Log a new activity. Raises ValueError with the overlapping rows if the range is taken."""
+    try:
+        with get_cursor(write=True) as cursor:
             cursor.execute(
-                "INSERT INTO activity_tags (activity_id, tag_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                (activity_id, tag_id),
+                "INSERT INTO activities (start_time, end_time, category_id, notes) VALUES (%s, %s, %s, %s) RETURNING id, duration_minutes",
+                (start_time, end_time, category_id, notes or None),
             )
-    
-    return activity_id, int((end_time - start_time).total_seconds() / 60)
+            activity_id, duration = cursor.fetchone()
+
+            if tag_ids:
+                execute_values(
+                    cursor,
+                    "INSERT INTO activity_tags (activity_id, tag_id) VALUES %s ON CONFLICT DO NOTHING",
+                    [(activity_id, tag_id) for tag_id in tag_ids],
+                )
+    except errors.ExclusionViolation:
+        # The no_overlap constraint fired; fetch the conflicting rows for the message.
+        raise ValueError(check_overlap_range(start_time, end_time))
+
+    return activity_id, duration
 
 def update_activity(activity_id, start_time=None, end_time=None, category_id=None, notes=None):
-    """Update activity fields."""
-    if start_time is not None or end_time is not None:
-        activity = get_activity(activity_id)
-        if not activity:
-            return False
-        
-        overlaps = check_overlap_range(
-            start_time or activity['start_time'],
-            end_time or activity['end_time'],
-            exclude_id=activity_id
-        )
-        if overlaps:
-            raise ValueError(overlaps)
-    
+    """Update activity fields. Raises ValueError with the overlapping rows if the new range is taken."""
     updates, params = [], []
     for field, value in [("start_time", start_time), ("end_time", end_time), ("category_id", category_id)]:
         if value is not None:
@@ -151,9 +232,18 @@ def update_activity(activity_id, start_time=None, end_time=None, category_id=Non
         return False
     
     params.append(activity_id)
-    with get_cursor(write=True) as cursor:
-        cursor.execute(f"UPDATE activities SET {', '.join(updates)} WHERE id = %s", params)
-        return cursor.rowcount > 0
+    try:
+        with get_cursor(write=True) as cursor:
+            cursor.execute(f"UPDATE activities SET {', '.join(updates)} WHERE id = %s", params)
+            return cursor.rowcount > 0
+    except errors.ExclusionViolation:
+        # The no_overlap constraint fired; resolve the final range (filling in
+        # unchanged bounds from the row) only to build the error payload.
+        if start_time is None or end_time is None:
+            activity = get_activity(activity_id)
+            start_time = start_time or activity['start_time']
+            end_time = end_time or activity['end_time']
+        raise ValueError(check_overlap_range(start_time, end_time, exclude_id=activity_id))
 
 def update_activity_category(activity_id, new_category_id):
     """Update activity category."""
@@ -161,13 +251,25 @@ def update_activity_category(activity_id, new_category_id):
         cursor.execute("UPDATE activities SET category_id = %s WHERE id = %s", (new_category_id, activity_id))
 
 def update_activity_tags(activity_id, tag_ids):
-    """Replace activity tags."""
+    """Replace activity tags, writing only the rows that actually change."""
+    new_ids = set(tag_ids)
     with get_cursor(write=True) as cursor:
-        cursor.execute("DELETE FROM activity_tags WHERE activity_id = %s", (activity_id,))
-        for tag_id in tag_ids:
+        cursor.execute("SELECT tag_id FROM activity_tags WHERE activity_id = %s", (activity_id,))
+        existing_ids = {row[0] for row in cursor.fetchall()}
+
+        to_remove = existing_ids - new_ids
+        to_add = new_ids - existing_ids
+
+        if to_remove:
             cursor.execute(
-                "INSERT INTO activity_tags (activity_id, tag_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                (activity_id, tag_id),
+                "DELETE FROM activity_tags WHERE activity_id = %s AND tag_id = ANY(%s)",
+                (activity_id, list(to_remove)),
+            )
+        if to_add:
+            execute_values(
+                cursor,
+                "INSERT INTO activity_tags (activity_id, tag_id) VALUES %s ON CONFLICT DO NOTHING",
+                [(activity_id, tag_id) for tag_id in to_add],
             )
 
 def delete_activity(activity_id):
@@ -184,44 +286,63 @@ def get_activity(activity_id):
     """Get single activity details."""
     with get_cursor(write=False) as cursor:
         cursor.execute(
-            """SELECT id, start_time, end_time, category_id, category_name, notes, 
-                      duration_minutes, tags, category_color 
-               FROM activities_view WHERE id = %s""",
+            """SELECT id, start_time, end_time, category_id, category_name, notes,
+                      duration_minutes, tags, category_color,
+                      (SELECT COALESCE(array_agg(tag_id), '{}')
+                       FROM activity_tags WHERE activity_id = v.id) AS tag_ids
+               FROM activities_view v WHERE id = %s""",
             (activity_id,),
         )
         row = cursor.fetchone()
         if not row:
             return None
-        
-        cursor.execute("SELECT tag_id FROM activity_tags WHERE activity_id = %s", (activity_id,))
-        
+
         return {
             'id': row[0], 'start_time': row[1], 'end_time': row[2], 'category_id': row[3],
             'category_name': row[4], 'notes': row[5], 'duration_minutes': row[6], 'tags': row[7],
-            'category_color': row[8], 'tag_ids': [r[0] for r in cursor.fetchall()],
+            'category_color': row[8], 'tag_ids': row[9],
         }
 
+# Lean equivalent of activities_view for list fetches: the view GROUPs and
+# ORDERs every activity before the WHERE can prune, so spell out the join and
+# aggregate tags per matching row instead. The view itself stays for
+# get_activity and external consumers.
+_ACTIVITY_COLS = """a.id, a.start_time, a.end_time, c.name,
+                    a.duration_minutes,
+                    COALESCE((SELECT STRING_AGG(t.name, ', ' ORDER BY t.name)
+                              FROM activity_tags at
+                              JOIN tags t ON at.tag_id = t.id
+                              WHERE at.activity_id = a.id), ''),
+                    a.notes, c.color"""
+
 def _get_activities(where_clause, params, order="ASC", limit=None):
     """Generic activity fetcher - returns with color."""
-    query = f"""SELECT id, start_time, end_time, category_name, duration_minutes, 
-                       tags, notes, category_color 
-                FROM activities_view 
-                WHERE {where_clause} 
+    # The window sum would run over the whole match set before LIMIT applies,
+    # so limited fetches select NULL instead and the formatter accumulates.
+    total_col = "NULL" if limit else "SUM(a.duration_minutes) OVER ()"
+    query = f"""SELECT {_ACTIVITY_COLS},
+                       {total_col}
+                FROM activities a
+                JOIN categories c ON a.category_id = c.id
+                WHERE {where_clause}
                 ORDER BY start_time {order}"""
     if limit:
         query += f" LIMIT {limit}"
-    
-    with get_cursor(write=False) as cursor:
+
+    # Named cursor: rows arrive in itersize batches rather than one message.
+    with get_cursor(write=False, name="activities_fetch") as cursor:
         cursor.execute(query, params)
-        return cursor.fetchall()
+        return [ActivityRow(*row) for row in cursor]
 
 def get_activities_by_date(target_date):
     """Get activities for a specific date."""
-    return _get_activities("DATE(start_time) = %s", (target_date,))
+    return _get_activities("start_time >= %s AND start_time < %s",
+                           (target_date, target_date + timedelta(days=1)))
 
 def get_activities_in_range(start_date, end_date):
     """Get activities within date range."""
-    return _get_activities("DATE(start_time) >= %s AND DATE(start_time) <= %s", (start_date, end_date))
+    return _get_activities("start_time >= %s AND start_time < %s",
+                           (start_date, end_date + timedelta(days=1)))
 
 def get_recent_activities(limit=10):
     """Get most recent activities."""
@@ -232,25 +353,28 @@ def report_daily(start_date, end_date):
     with get_cursor(write=False) as cursor:
         cursor.execute("""
             SELECT DATE(start_time), COUNT(*), 
-                   COALESCE(SUM(EXTRACT(EPOCH FROM (end_time - start_time)) / 60), 0)::INTEGER
-            FROM activities WHERE DATE(start_time) >= %s AND DATE(start_time) <= %s
+                   COALESCE(SUM(duration_minutes), 0)::INTEGER
+            FROM activities WHERE start_time >= %s AND start_time < %s
             GROUP BY DATE(start_time) ORDER BY DATE(start_time) DESC
-        """, (start_date, end_date))
+        """, (start_date, end_date + timedelta(days=1)))
         return cursor.fetchall()
 
 def report_categories(start_date, end_date):
     """Generate category time report."""
     with get_cursor(write=False) as cursor:
         cursor.execute("""
-            SELECT c.name, c.color, COUNT(a.id), 
-                   COALESCE(SUM(EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 60), 0)::INTEGER
+            SELECT c.name, c.color, COUNT(a.id),
+                   COALESCE(SUM(a.duration_minutes), 0)::INTEGER,
+                   ROUND(100.0 * COALESCE(SUM(a.duration_minutes), 0)
+                         / NULLIF(SUM(COALESCE(SUM(a.duration_minutes), 0)) OVER (), 0), 1),
+                   SUM(COALESCE(SUM(a.duration_minutes), 0)) OVER ()::INTEGER
             FROM categories c
             LEFT JOIN activities a ON c.id = a.category_id 
-                AND DATE(a.start_time) >= %s AND DATE(a.start_time) <= %s
+                AND a.start_time >= %s AND a.start_time < %s
             GROUP BY c.id, c.name, c.color 
             HAVING COUNT(a.id) > 0 
             ORDER BY 4 DESC
-        """, (start_date, end_date))
+        """, (start_date, end_date + timedelta(days=1)))
         return cursor.fetchall()
 
 def report_tags(start_date, end_date):
@@ -258,14 +382,14 @@ def report_tags(start_date, end_date):
     with get_cursor(write=False) as cursor:
         cursor.execute("""
             SELECT c.name, c.color, t.name, COUNT(DISTINCT a.id),
-                   COALESCE(SUM(EXTRACT(EPOCH FROM (a.end_time - a.start_time)) / 60), 0)::INTEGER
+                   COALESCE(SUM(a.duration_minutes), 0)::INTEGER
             FROM tags t
             JOIN categories c ON t.category_id = c.id
             LEFT JOIN activity_tags at ON t.id = at.tag_id
             LEFT JOIN activities a ON at.activity_id = a.id 
-                AND DATE(a.start_time) >= %s AND DATE(a.start_time) <= %s
+                AND a.start_time >= %s AND a.start_time < %s
             GROUP BY c.id, c.name, c.color, t.id, t.name 
             HAVING COUNT(a.id) > 0 
             ORDER BY c.name, 5 DESC
-        """, (start_date, end_date))
+        """, (start_date, end_date + timedelta(days=1)))
         return cursor.fetchall()
\ No newline at end of file